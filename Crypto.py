@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import requests
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import requests_cache
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Set page config
 st.set_page_config(
@@ -13,236 +19,376 @@ st.set_page_config(
 
 # Binance API Base URL
 BINANCE_BASE_URL = "https://api.binance.us"
-BINANCE_URL = "https://api.binance.us/api/v3/ticker/24hr"
 COINGECKO_URL = "https://api.coingecko.com/api/v3/coins/markets"
 BTC_DOMINANCE_URL = "https://api.coingecko.com/api/v3/global"
 FUTURES_URL = "https://fapi.binance.com/fapi/v1/openInterest"
 COINMARKETCAP_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
+REQUEST_TIMEOUT = (2.0, 5.0)  # (connect, read) seconds
+KLINES_REFRESH_LIMIT = 50
+
+# Cryptocurrencies offered in the sidebar (Binance pairs)
+CRYPTO_OPTIONS = {
+    "Bitcoin (BTC)": "BTCUSDT",
+    "Ethereum (ETH)": "ETHUSDT",
+    "Binance Coin (BNB)": "BNBUSDT",
+    "Solana (SOL)": "SOLUSDT",
+    "Cardano (ADA)": "ADAUSDT"
+}
+
+# CoinGecko market_cap_percentage keys for each Binance pair
+COINGECKO_KEYS = {
+    "BTCUSDT": "btc",
+    "ETHUSDT": "eth",
+    "BNBUSDT": "bnb",
+    "SOLUSDT": "sol",
+    "ADAUSDT": "ada"
+}
+
+# Timeframes offered in the sidebar (Binance intervals)
+TIMEFRAME_OPTIONS = {
+    "1 Min": "1m",
+    "5 Min": "5m",
+    "15 Min": "15m",
+    "1 Hour": "1h",
+    "4 Hours": "4h",
+    "1 Day": "1d",
+    "1 Week": "1w"
+}
+
+# Typed layout of the leading kline fields the dashboard uses:
+# [open_time, open, high, low, close, volume, close_time, ...]
+KLINES_DTYPE = np.dtype([
+    ("timestamp", "i8"),
+    ("open", "f4"),
+    ("high", "f4"),
+    ("low", "f4"),
+    ("close", "f4"),
+    ("volume", "f4")
+])
+
+# Function to get the shared HTTP session
+@st.cache_resource
+def get_session():
+    """
+    Create the pooled HTTP session once per server process, so keep-alive
+    connections are reused across reruns and viewers. Responses are also
+    persisted to SQLite, so a server restart or another viewer within the
+    expiry window doesn't pay the API latency again.
+    """
+    session = requests_cache.CachedSession(
+        "crypto_cache",
+        backend="sqlite",
+        expire_after=30,
+        urls_expire_after={
+            "api.binance.us/api/v3/ticker": 5,
+            "api.coingecko.com": 300,
+            "blockchain.info": 600
+        },
+        # Incremental klines refreshes get a new startTime every candle, so
+        # persisting them would only grow the database with single-use rows
+        filter_fn=lambda response: "startTime=" not in response.url
+    )
+    # Expired rows are never removed on their own, so purge them on startup
+    session.cache.delete(expired=True)
+    session.headers.update({"Connection": "keep-alive"})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=50,
+        max_retries=Retry(
+            total=2,
+            connect=2,
+            read=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # A Retry-After of up to hours would stall the whole page; use the backoff only
+            respect_retry_after_header=False
+        )
+    ))
+    return session
 
 # Function to get Binance market data
-def get_binance_data(symbol, interval, limit=100):
+@st.cache_data(ttl=30, show_spinner=False)
+def get_binance_data(symbol, interval, limit=100, start_time=None):
     """Fetch historical market data from Binance"""
-    try:
-        url = f"{BINANCE_BASE_URL}/api/v3/klines"
-        params = {"symbol": symbol, "interval": interval, "limit": limit}
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        if isinstance(data, dict) and "code" in data:  # Binance API Error
-            st.error(f"Binance API Error: {data['msg']}")
-            return None
-
-        df = pd.DataFrame(data, columns=[
-            "timestamp", "open", "high", "low", "close", "volume",
-            "close_time", "quote_asset_volume", "num_trades",
-            "taker_buy_base", "taker_buy_quote", "ignore"
-        ])
-
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        df[["open", "high", "low", "close", "volume"]] = df[
-            ["open", "high", "low", "close", "volume"]
-        ].astype(float)
-
-        return df
-    except Exception as e:
-        st.error(f"Error fetching Binance data: {e}")
-        return None
+    url = f"{BINANCE_BASE_URL}/api/v3/klines"
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
+    data = orjson.loads(response.content)
+
+    if isinstance(data, dict) and "code" in data:  # Binance API Error
+        raise RuntimeError(f"Binance API Error: {data['msg']}")
+
+    # Parse only the leading fields straight into a preallocated typed buffer
+    klines = np.fromiter(
+        (
+            (int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+            for row in data
+        ),
+        dtype=KLINES_DTYPE,
+        count=len(data)
+    )
+
+    df = pd.DataFrame(klines)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+
+    return df
+
+# Function to keep the session's market data current by fetching only new candles
+def load_binance_data(symbol, interval, limit=100):
+    """
+    Return the latest market data for the pair. After the first full load,
+    only the candles from the last loaded one onwards are fetched and merged.
+    """
+    klines = st.session_state.setdefault("klines", {})
+    previous = klines.get((symbol, interval))
+
+    df = None
+    if previous is not None:
+        # Binance expects startTime in milliseconds
+        start_time = previous["timestamp"].iloc[-1].value // 1_000_000
+        try:
+            tail = get_binance_data(symbol, interval, KLINES_REFRESH_LIMIT, start_time)
+        except (requests.RequestException, RuntimeError, ValueError) as e:
+            # Keep showing the last loaded candles, but say they are stale
+            st.error(f"Error refreshing Binance data: {e}")
+            return previous
+
+        # A full page means candles may be missing in between, so reload everything
+        if len(tail) < KLINES_REFRESH_LIMIT:
+            df = (
+                pd.concat([previous, tail])
+                .drop_duplicates("timestamp", keep="last")
+                .tail(limit)
+                .reset_index(drop=True)
+            )
+
+    if df is None:
+        df = get_binance_data(symbol, interval, limit)
+
+    if not df.empty:
+        klines[(symbol, interval)] = df
+    return df
 
 # Function to get real-time crypto market data
+@st.cache_data(ttl=5, show_spinner=False)
 def get_binance_ticker(symbol):
     """Fetch real-time price & market stats from Binance"""
-    try:
-        url = f"{BINANCE_BASE_URL}/api/v3/ticker/24hr"
-        params = {"symbol": symbol}
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        if "code" in data:
-            st.error(f"Binance API Error: {data['msg']}")
-            return None
-
-        return {
-            "price": float(data["lastPrice"]),
-            "change": float(data["priceChangePercent"]),
-            "volume": float(data["quoteVolume"])
-        }
-    except Exception as e:
-        st.error(f"Error fetching Binance ticker: {e}")
-        return None
+    url = f"{BINANCE_BASE_URL}/api/v3/ticker/24hr"
+    params = {"symbol": symbol}
+    response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
+    data = orjson.loads(response.content)
+
+    if "code" in data:
+        raise RuntimeError(f"Binance API Error: {data['msg']}")
+
+    return {
+        "price": float(data["lastPrice"]),
+        "change": float(data["priceChangePercent"]),
+        "volume": float(data["quoteVolume"]),
+        "high": float(data["highPrice"]),
+        "low": float(data["lowPrice"]),
+        "base_volume": float(data["volume"])
+    }
 
 # Function to get Bitcoin blockchain stats
+@st.cache_data(ttl=600, show_spinner=False)
 def get_blockchain_info():
     """Fetch Bitcoin network statistics from Blockchain.info API"""
-    try:
-        difficulty_url = "https://blockchain.info/q/getdifficulty"
-        hashrate_url = "https://blockchain.info/q/hashrate"
-        
-        difficulty = requests.get(difficulty_url).json()
-        hashrate = requests.get(hashrate_url).json()
-        
-        return {
-            'difficulty': difficulty,
-            'hashrate': hashrate / 1e6  # Convert to EH/s
-        }
-    except Exception as e:
-        st.error(f"Error fetching blockchain data: {e}")
-        return None
+    difficulty_url = "https://blockchain.info/q/getdifficulty"
+    hashrate_url = "https://blockchain.info/q/hashrate"
+    
+    # Both stats come from the same host, so fetch them in parallel over the pooled session
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        difficulty_future = executor.submit(session.get, difficulty_url, timeout=REQUEST_TIMEOUT)
+        hashrate_future = executor.submit(session.get, hashrate_url, timeout=REQUEST_TIMEOUT)
+
+    difficulty_response = difficulty_future.result()
+    hashrate_response = hashrate_future.result()
+    difficulty_response.raise_for_status()
+    hashrate_response.raise_for_status()
+
+    # Both endpoints return a bare number, so skip the JSON parser
+    difficulty = float(difficulty_response.text)
+    hashrate = float(hashrate_response.text)
+    
+    return {
+        'difficulty': difficulty,
+        'hashrate': hashrate / 1e6  # Convert to EH/s
+    }
 # Function to get open interest
+@st.cache_data(ttl=30, show_spinner=False)
 def get_open_interest(symbol):
-    params = {"symbol": symbol.upper()}
-    try:
-        response = requests.get(FUTURES_URL, params=params)
-        if response.status_code == 200:
-            return float(response.json()['openInterest'])
-        return None
-    except Exception as e:
-        st.error(f"Error fetching open interest data: {e}")
-        return None
+    params = {"symbol": symbol}
+    response = get_session().get(FUTURES_URL, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return float(orjson.loads(response.content)['openInterest'])
+# Function to get global market data
+@st.cache_data(ttl=300, show_spinner=False)
+def get_coingecko_global():
+    """
+    Fetch the global market data from the CoinGecko API. One response
+    carries the dominance of every coin, so it is shared across selections.
+    """
+    response = get_session().get(BTC_DOMINANCE_URL, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)['data']
+
 # Function to get Coin dominance
 def get_crypto_dominance(symbol):
     """
-    Fetch the dominance of the selected cryptocurrency
-    from the CoinGecko API using the global market data.
+    Look up the dominance of the selected cryptocurrency
+    in the CoinGecko global market data.
+    Returns None if CoinGecko has no dominance for the coin.
+    """
+    # Fetch the market cap percentage of the selected coin from the global market data
+    market_cap_percentages = get_coingecko_global()['market_cap_percentage']
+
+    # Get the dominance percentage of the selected crypto
+    dominance = market_cap_percentages.get(COINGECKO_KEYS[symbol], None)
+    return float(dominance) if dominance is not None else None
+
+# Function to read a fetch result, reporting failures rather than caching them
+def get_result(future, source, report=True):
+    """
+    Return the future's result, or None if it failed. The error is shown
+    unless report is False, for optional data that may be unavailable.
     """
     try:
-        # CoinGecko API request to get global market data (including market caps)
-        response = requests.get(BTC_DOMINANCE_URL)
-        
-        if response.status_code == 200:
-            data = response.json()['data']
-            
-            # Get the total market cap for all cryptocurrencies
-            total_market_cap = data['total_market_cap']
-            
-            # Fetch the market cap percentage of the selected coin from the global market data
-            market_cap_percentages = data['market_cap_percentage']
-            
-            # Map selected crypto name to the CoinGecko format for dominance
-            selected_crypto_symbol = crypto_options.get(symbol, None)
-            
-            if selected_crypto_symbol:
-                # Get the dominance percentage of the selected crypto
-                dominance = market_cap_percentages.get(selected_crypto_symbol.split("USDT")[0].lower(), None)
-                
-                if dominance is not None:
-                    return float(dominance)
-                else:
-                    return f"Dominance data for {selected_crypto_name} is not available."
-            else:
-                return "Selected crypto is not available in the options."
-
-        else:
-            return "Error fetching market data from CoinGecko."
+        return future.result()
+    except Exception as e:
+        if report:
+            st.error(f"Error fetching {source}: {e}")
+        return None
 
+# Function to display the market metrics, refreshed on a timer without rerunning the page
+@st.fragment(run_every="5s")
+def display_market_metrics(symbol, crypto_name, dominance, open_interest):
+    """Render the ticker metrics from the cached 24hr ticker"""
+    try:
+        ticker = get_binance_ticker(symbol)
     except Exception as e:
-        return f"Error: {e}"
+        st.error(f"Error fetching Binance ticker: {e}")
+        ticker = None
 
+    # Stamped here so it refreshes with the metrics rather than with the page
+    st.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col5, col6, col7, col8 = st.columns(4)
+    col9 = st.columns(4)[0]
+
+    if ticker:
+        col1.metric("24H High", f"${ticker['high']:,.2f}")
+        col2.metric("24H Low", f"${ticker['low']:,.2f}")
+        col3.metric("24H Volume (BTC)", f"{ticker['base_volume']:,.2f} BTC")
+        col4.metric("24H Volume (USD)", f"${ticker['volume']:,.2f}")
+
+    if dominance is not None:
+        col8.metric(f"{crypto_name} Dominance", f"{dominance:,.2f}%")
+
+    # Display real-time market data
+    if ticker:
+        col5.metric("Current Price", f"${ticker['price']:,.2f}")
+        col6.metric("24h Change", f"{ticker['change']}%", delta=ticker['change'])
+        col7.metric("24h Volume", f"${ticker['volume']:,.2f}")
+
+    if open_interest is not None:
+        col9.metric(
+            "Futures Open Interest",
+            f"{open_interest:,.2f}",
+            help="Open USDT-M futures contracts, in units of the base asset"
+        )
 
-# Function to get open interest
-def get_open_interest(symbol):
-    params = {"symbol": symbol.upper()}
-    response = requests.get(FUTURES_URL, params=params)
-    if response.status_code == 200:
-        return float(response.json()['openInterest'])
-    return None
-
-def get_binance_data2(symbol):
-    params = {"symbol": symbol.upper()}
-    response = requests.get(BINANCE_URL, params=params)
-    if response.status_code == 200:
-        return response.json()
-    return None
 
 # Sidebar settings
 st.sidebar.title("Slicers")
 
 # Cryptocurrency selection (Binance pairs)
-crypto_options = {
-    "Bitcoin (BTC)": "BTCUSDT",
-    "Ethereum (ETH)": "ETHUSDT",
-    "Binance Coin (BNB)": "BNBUSDT",
-    "Solana (SOL)": "SOLUSDT",
-    "Cardano (ADA)": "ADAUSDT"
-}
 selected_crypto = st.sidebar.selectbox(
-    "Select Cryptocurrency", list(crypto_options.keys())
+    "Select Cryptocurrency", list(CRYPTO_OPTIONS.keys())
 )
 
-crypto_symbol_name = selected_crypto
-
 # Timeframe selection (Binance intervals)
-timeframe_options = {
-    "1 Min": "1m",
-    "5 Min": "5m",
-    "15 Min": "15m",
-    "1 Hour": "1h",
-    "4 Hours": "4h",
-    "1 Day": "1d",
-    "1 Week": "1w"
-}
 selected_timeframe = st.sidebar.selectbox(
-    "Select Timeframe", list(timeframe_options.keys())
+    "Select Timeframe", list(TIMEFRAME_OPTIONS.keys())
 )
 
+# Drop cached API responses so the next fetches hit the APIs again
+if st.sidebar.button("Refresh"):
+    st.cache_data.clear()
+    get_session().cache.clear()
+
 # Load Binance data
-crypto_symbol = crypto_options[selected_crypto]
-interval = timeframe_options[selected_timeframe]
+crypto_symbol = CRYPTO_OPTIONS[selected_crypto]
+interval = TIMEFRAME_OPTIONS[selected_timeframe]
+
+# The API calls are independent, so run them concurrently on the shared session
+with ThreadPoolExecutor(
+    max_workers=8, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())
+) as executor:
+    df_future = executor.submit(load_binance_data, crypto_symbol, interval)
+    ticker_future = executor.submit(get_binance_ticker, crypto_symbol)
+    dominance_future = executor.submit(get_crypto_dominance, crypto_symbol)
+    open_interest_future = executor.submit(get_open_interest, crypto_symbol)
+    # Network stats are only shown for Bitcoin
+    blockchain_info_future = (
+        executor.submit(get_blockchain_info) if selected_crypto == "Bitcoin (BTC)" else None
+    )
 
-df = get_binance_data(crypto_symbol, interval)
-ticker = get_binance_ticker(crypto_symbol)
-binance_data = get_binance_data2(crypto_symbol)
-dominance = get_crypto_dominance(crypto_symbol_name)
-open_interest = get_open_interest(crypto_symbol)
+df = get_result(df_future, "Binance data")
+# Ticker failures are reported by the market metrics fragment, which reads the same ticker
+ticker = None if ticker_future.exception() else ticker_future.result()
+dominance = get_result(dominance_future, "dominance data")
+# Binance Futures answers 451 to US clients, so a missing value isn't reported
+open_interest = get_result(open_interest_future, "open interest data", report=False)
+blockchain_info = get_result(blockchain_info_future, "blockchain data") if blockchain_info_future else None
 
 # Dashboard Title
 st.title("Crypto Real Time Analysis Dashboard")
-st.write(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 # Display Metrics
 st.subheader(f"{selected_crypto} Market Metrics")
-col1, col2, col3, col4 = st.columns(4)
-col5, col6, col7, col8 = st.columns(4)
-
-if binance_data:
-    col1.metric("24H High", f"${float(binance_data['highPrice']):,.2f}")
-    col2.metric("24H Low", f"${float(binance_data['lowPrice']):,.2f}")
-    col3.metric("24H Volume (BTC)", f"{float(binance_data['volume']):,.2f} BTC")
-    col4.metric("24H Volume (USD)", f"${float(binance_data['quoteVolume']):,.2f}")
-        
-if dominance:
-    col8.metric(f"{selected_crypto} Dominance", f"{float(dominance):,.2f}%")
-
-# Display real-time market data
-if ticker:
-    col5.metric("Current Price", f"${ticker['price']:,.2f}")
-    col6.metric("24h Change", f"{ticker['change']}%", delta=ticker['change'])
-    col7.metric("24h Volume", f"${ticker['volume']:,.2f}")
+display_market_metrics(crypto_symbol, selected_crypto, dominance, open_interest)
 
 st.subheader(f"Today's Insights")
 
-if binance_data:
+if ticker:
     # Generate the insight text based on the selected crypto data
-    insight_text = f"""
-        {selected_crypto} is currently trading at ${ticker['price']:,.2f}. 
-        Over the last 24 hours, it has reached a high of ${float(binance_data['highPrice']):,.2f} and a low of ${float(binance_data['lowPrice']):,.2f}. 
-        Trading volume for the past 24 hours was ${float(binance_data['quoteVolume']):,.2f} USD, with a market cap dominance of {float(dominance):,.2f}% of the total market. 
-        The 24H price change stands at {ticker['change']}%."""
+    insight_parts = [
+        f"{selected_crypto} is currently trading at ${ticker['price']:,.2f}. ",
+        f"Over the last 24 hours, it has reached a high of ${ticker['high']:,.2f} and a low of ${ticker['low']:,.2f}. ",
+        f"Trading volume for the past 24 hours was ${ticker['volume']:,.2f} USD"
+    ]
+    if dominance is not None:
+        insight_parts.append(f", with a market cap dominance of {dominance:,.2f}% of the total market")
+    insight_parts.append(f". The 24H price change stands at {ticker['change']}%.")
+    insight_text = "".join(insight_parts)
 
     # Display the generated insights text
     st.markdown(f"<p style='font-size:16px;'>{insight_text}</p>", unsafe_allow_html=True)
 
 # Display historical data
 if df is not None and not df.empty:
+    # Plotly is heavy to import, so only load it once there is a chart to draw
+    import plotly.graph_objects as go
+
     st.subheader(f"{selected_crypto} - {selected_timeframe} Chart")
 
+    # Extract the plot arrays once so Plotly doesn't convert each Series itself
+    timestamps = df["timestamp"].to_numpy(copy=False)
+    closes = df["close"].to_numpy(copy=False)
+
     # Candlestick Chart
     fig = go.Figure()
     fig.add_trace(go.Candlestick(
-        x=df["timestamp"],
-        open=df["open"],
-        high=df["high"],
-        low=df["low"],
-        close=df["close"],
+        x=timestamps,
+        open=df["open"].to_numpy(copy=False),
+        high=df["high"].to_numpy(copy=False),
+        low=df["low"].to_numpy(copy=False),
+        close=closes,
         name="Candlesticks"
     ))
     
@@ -257,12 +403,10 @@ if df is not None and not df.empty:
 
     # Line Chart
     st.subheader("Closing Price Trend")
-    st.line_chart(df.set_index("timestamp")["close"])
+    st.line_chart(pd.Series(closes, index=timestamps, name="close", copy=False))
 
 # Display Bitcoin-specific metrics
 if selected_crypto == "Bitcoin (BTC)":
-    blockchain_info = get_blockchain_info()
-
     if blockchain_info:
         st.subheader("Bitcoin Network Metrics")
         col1, col2 = st.columns(2)